@@ -0,0 +1,93 @@
+# ffmpeg_pool.py
+
+import asyncio
+import logging
+from collections import deque
+
+
+class FFmpegPool:
+    """
+    Keeps pre-launched FFmpeg processes waiting on stdin for each pooled output
+    format, so a transcode does not pay the process start-up cost on the request path.
+
+    Each process handles exactly one job (FFmpeg ends its stream on stdin EOF);
+    a replacement is launched in the background as soon as one is taken.
+    """
+
+    def __init__(self, pipelines, size):
+        # Maps response format -> FFmpeg command reading pipe:0 and writing pipe:1
+        self.pipelines = pipelines
+        self.size = max(1, size)
+        self._idle = {fmt: deque() for fmt in pipelines}
+        self._tasks = set()
+
+    def has(self, fmt):
+        return fmt in self.pipelines
+
+    async def _launch(self, fmt):
+        return await asyncio.create_subprocess_exec(
+            *self.pipelines[fmt],
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+    async def _spawn(self, fmt):
+        try:
+            self._idle[fmt].append(await self._launch(fmt))
+        except Exception as e:
+            logging.error(f"Failed to launch pooled FFmpeg process for {fmt}: {e}")
+
+    def _refill(self, fmt):
+        pending = sum(1 for task in self._tasks if task.get_name() == fmt)
+        if len(self._idle[fmt]) + pending >= self.size:
+            return
+        task = asyncio.create_task(self._spawn(fmt), name=fmt)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self):
+        """Launches `size` idle processes for every pooled format."""
+        await asyncio.gather(*(self._spawn(fmt) for fmt in self.pipelines for _ in range(self.size)))
+        logging.info(f"Started FFmpeg pool with {self.size} processes for: {', '.join(self.pipelines)}")
+
+    async def close(self):
+        """Kills all idle processes."""
+        for task in list(self._tasks):
+            task.cancel()
+        for procs in self._idle.values():
+            while procs:
+                proc = procs.popleft()
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+
+    async def acquire(self, fmt):
+        """Takes an idle process for fmt (launching one if none is ready); the caller owns it."""
+        idle = self._idle[fmt]
+        proc = None
+        while idle:
+            proc = idle.popleft()
+            if proc.returncode is None:
+                break
+            proc = None
+        if proc is None:
+            proc = await self._launch(fmt)
+        self._refill(fmt)
+        return proc
+
+    async def submit(self, input_bytes, fmt):
+        """Feeds input_bytes to a pooled process for fmt and returns its stdout."""
+        proc = await self.acquire(fmt)
+        try:
+            stdout, stderr = await proc.communicate(input_bytes)
+        except BaseException:
+            # The process is ours alone, so don't leave it running if we are cancelled
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        if proc.returncode:
+            logging.error(f"FFmpeg error during audio conversion: {stderr.decode(errors='replace')}")
+            raise RuntimeError(f"FFmpeg error during audio conversion: exit code {proc.returncode}")
+        return stdout
@@ -1,6 +1,10 @@
 import re
+import functools
 import emoji
 
+# Only short texts are memoised, so the cache stays bounded in memory
+CACHE_MAX_CHARS = 2000
+
 def prepare_tts_input_with_context(text: str) -> str:
     """
     Prepares text for a TTS API by cleaning Markdown and adding minimal contextual hints
@@ -12,7 +16,17 @@ def prepare_tts_input_with_context(text: str) -> str:
     Returns:
         str: Cleaned text with contextual hints suitable for TTS input.
     """
+    if len(text) <= CACHE_MAX_CHARS:
+        return _prepare_tts_input_cached(text)
+    return _prepare_tts_input(text)
+
+
+@functools.lru_cache(maxsize=1024)
+def _prepare_tts_input_cached(text: str) -> str:
+    return _prepare_tts_input(text)
+
 
+def _prepare_tts_input(text: str) -> str:
     # Remove emojis
     text = emoji.replace_emoji(text, replace='')
 
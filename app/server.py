@@ -1,15 +1,19 @@
 # server.py
 
-from flask import Flask, request, send_file, jsonify
-from gevent.pywsgi import WSGIServer
+from quart import Quart, request, send_file, jsonify
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
 from dotenv import load_dotenv
+import asyncio
 import os
 
 from handle_text import prepare_tts_input_with_context
-from tts_handler import generate_speech, get_models, get_voices
-from utils import getenv_bool, AUDIO_FORMAT_MIME_TYPES
+from tts_handler import generate_speech, get_models, get_voices, start_ffmpeg_pool, stop_ffmpeg_pool
+from utils import getenv_bool, FORMAT_TABLE, OrjsonProvider
+from xunjie_tts.xunjie_client import close_session
 
-app = Flask(__name__)
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
 load_dotenv()
 
 API_KEY = os.getenv('API_KEY', 'your_api_key_here')
@@ -24,10 +28,21 @@ EXPAND_API = getenv_bool('EXPAND_API', True)
 
 # DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'tts-1')
 
+@app.before_serving
+async def startup():
+    # Pre-launch FFmpeg processes for pooled response formats
+    await start_ffmpeg_pool()
+
+@app.after_serving
+async def shutdown():
+    # Close the shared HTTP session used for Xunjie API calls
+    await close_session()
+    await stop_ffmpeg_pool()
+
 @app.route('/v1/audio/speech', methods=['POST'])
 @app.route('/audio/speech', methods=['POST'])  # Add this line for the alias
-def text_to_speech():
-    data = request.json
+async def text_to_speech():
+    data = await request.get_json()
     if not data or 'input' not in data:
         return jsonify({"error": "Missing 'input' in request body"}), 400
     text = data.get('input')
@@ -44,15 +59,20 @@ def text_to_speech():
     voice = data.get('voice', DEFAULT_VOICE)
 
     response_format = data.get('response_format', DEFAULT_RESPONSE_FORMAT)
+    if response_format not in FORMAT_TABLE:
+        return jsonify({"error": f"Unsupported response_format '{response_format}'. Supported formats: {', '.join(FORMAT_TABLE)}"}), 400
     speed = float(data.get('speed', DEFAULT_SPEED))
     
-    mime_type = AUDIO_FORMAT_MIME_TYPES.get(response_format, "audio/mpeg")
+    _, _, mime_type, _ = FORMAT_TABLE[response_format]
 
     # Generate the audio file in the specified format with speed adjustment
-    output_file_path = generate_speech(api_key,text, voice, response_format, speed)
+    try:
+        output_file_path = await generate_speech(api_key,text, voice, response_format, speed)
+    except Exception as e:
+        return jsonify({"error": f"Speech generation failed: {e}"}), 502
 
     # Return the file with the correct MIME type
-    return send_file(output_file_path, mimetype=mime_type, as_attachment=True, download_name=f"speech.{response_format}")
+    return await send_file(output_file_path, mimetype=mime_type, as_attachment=True, attachment_filename=f"speech.{response_format}")
 
 # @app.route('/v1/models', methods=['GET', 'POST'])
 # @app.route('/models', methods=['GET', 'POST'])
@@ -78,5 +98,6 @@ def text_to_speech():
 
 
 if __name__ == '__main__':
-    http_server = WSGIServer(('0.0.0.0', PORT), app)
-    http_server.serve_forever()
+    config = Config()
+    config.bind = [f"0.0.0.0:{PORT}"]
+    asyncio.run(serve(app, config))
@@ -1,8 +1,8 @@
 import asyncio
+import io
 import tempfile
 import subprocess
 import os
-from pathlib import Path
 import re
 import json
 from datetime import datetime
@@ -10,9 +10,11 @@ import logging
 from mutagen.mp3 import MP3
 # from mutagen.id3 import TIT2
 from mutagen.easyid3 import EasyID3
-import shutil
-import time
-from xunjie_tts.xunjie_client import XunjieClient
+import functools
+import aiofiles
+from xunjie_tts.xunjie_client import close_session, get_session, xunjie_save, xunjie_synthesize
+from ffmpeg_pool import FFmpegPool
+from utils import FORMAT_TABLE
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -30,8 +32,12 @@ DEFAULT_OUTPUT_DIR = os.getenv('TTS_OUTPUT_DIR', 'tts_output')
 # Ensure the output directory exists
 os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
 
-# Track temporary file names
-TEMP_FILES = set()
+# Long texts are split into chunks of at most this many characters and synthesized concurrently
+MAX_CHUNK_CHARS = int(os.getenv('XUNJIE_MAX_CHUNK_CHARS', '200'))
+XUNJIE_PARALLELISM = int(os.getenv('XUNJIE_PARALLELISM', '8'))
+
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-run
+_BACKGROUND_TASKS = set()
 
 # Function to load voice mappings from a JSON file
 def load_voice_mappings(filepath='voice_mappings.json'):
@@ -50,14 +56,16 @@ def load_voice_mappings(filepath='voice_mappings.json'):
 # Load voice mappings on startup
 voice_mapping = load_voice_mappings()
 
+@functools.lru_cache(maxsize=1)
 def is_ffmpeg_installed():
-    """Check if FFmpeg is installed and accessible."""
+    """Check if FFmpeg is installed and accessible. The result is cached for the process lifetime."""
     try:
         subprocess.run(['ffmpeg', '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
 
+@functools.lru_cache(maxsize=512)
 def parse_voice_string(voice_string):
     """
     Parses the voice string to extract voice name, rate, and pitch adjustments.
@@ -65,94 +73,248 @@ def parse_voice_string(voice_string):
     voice_name[-rate][-pitch][-volume]
     """
 
-    match = re.match(r"([a-zA-Z0-9_]+)(?:[-](\d+))?(?:[-](\d+))?(?:[-](\d+))?", voice_string)
+    parts = voice_string.split('-', 3)
+    base_voice = parts[0]
 
-    if not match:
+    if not base_voice:
         logging.warning(f"Invalid voice string format: {voice_string}")
-        return voice_string, None, None
-
-    base_voice = match.group(1)
-    rate_str = match.group(2)
-    pitch_str = match.group(3)
-    volume_str = match.group(4)
-
-    rate = None
-    pitch = None
-    volume = None
-
-    if rate_str:
-        rate = int(rate_str)
-        if not    rate <= 10:  # Basic rate validation
-            logging.warning(f"Rate adjustment {rate} outside of reasonable bounds for: {voice_string}. Ignoring rate adjustment.")
-            rate = None
-
-    if pitch_str:
-        pitch = int(pitch_str)
-        if not pitch <= 10:  # Basic pitch validation
-            logging.warning(f"Pitch adjustment {pitch} outside of reasonable bounds for: {voice_string}. Ignoring pitch adjustment.")
-            pitch = None
-
-    if volume_str:
-        volume = int(volume_str)
-        if not volume <= 10:  # Basic volume validation
-            logging.warning(f"Volume adjustment {volume} outside of reasonable bounds for: {voice_string}. Ignoring volume adjustment.")
-            volume = None
+        return voice_string, None, None, None
+
+    adjustments = []
+    for name, value_str in zip(("Rate", "Pitch", "Volume"), parts[1:]):
+        try:
+            value = int(value_str)
+        except ValueError:
+            logging.warning(f"Invalid {name.lower()} adjustment '{value_str}' for: {voice_string}. Ignoring {name.lower()} adjustment.")
+            value = None
+        if value is not None and not 0 <= value <= 10:  # Basic range validation
+            logging.warning(f"{name} adjustment {value} outside of reasonable bounds for: {voice_string}. Ignoring {name.lower()} adjustment.")
+            value = None
+        adjustments.append(value)
+    adjustments += [None] * (3 - len(adjustments))
+    rate, pitch, volume = adjustments
 
     logging.debug(f"Parsed voice string: {voice_string} -> base_voice: {base_voice}, rate_change: {rate}, pitch_change: {pitch}, volume: {volume}")
     return base_voice, rate, pitch, volume
 
-async def _delayed_cleanup(file_path, retries=3, delay=30):
-    """Deletes a temporary file with retries."""
-    for attempt in range(retries):
-        try:
-            await asyncio.sleep(delay)
-            Path(file_path).unlink(missing_ok=True)
-            TEMP_FILES.discard(file_path)  # Remove from tracking
-            logging.debug(f"Deleted temporary file: {file_path} after {attempt+1} attempts")
-            return
-        except Exception as e:
-            logging.error(f"Error deleting temp file: {file_path}, attempt {attempt+1}: {e}")
-    logging.error(f"Failed to delete temp file: {file_path} after {retries} attempts.")
-
-async def _save_audio_file(temp_file_path, text, edge_tts_voice, response_format, save_output=False, converted_file=False):
-    """Saves the audio file, handles metadata, and cleans up temp files."""
-    output_filename = None
-    if not save_output:
-        return temp_file_path
+# A sentence is any run of text followed by its delimiters; leading delimiters form their own match
+_SENTENCE_RE = re.compile(r"[^。！？!?\n]*[。！？!?\n]*")
+
+# Places where an over-long sentence may be broken: clause punctuation, ". " and whitespace
+_CLAUSE_BREAK_RE = re.compile(r"[，,；;、]|\.(?=\s)|\s")
+
+def _split_long_sentence(sentence, max_chars):
+    """
+    Splits a sentence into pieces of at most max_chars characters, breaking after the
+    last clause punctuation or whitespace in each window and hard-cutting only when
+    the window has none.
+    """
+    pieces = []
+    while len(sentence) > max_chars:
+        # Look one character past the window so ". " can be recognised at its edge
+        breaks = [m.end() for m in _CLAUSE_BREAK_RE.finditer(sentence, 0, max_chars + 1) if m.end() <= max_chars]
+        cut = breaks[-1] if breaks else max_chars
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+    pieces.append(sentence)
+    return pieces
+
+def split_text(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Splits text on sentence boundaries into chunks of at most max_chars characters.
+    A sentence longer than max_chars is broken at clause punctuation or whitespace.
+    """
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_RE.findall(text):
+        for piece in _split_long_sentence(sentence, max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+    chunks.append(current)
+    chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
+    return chunks or [text]
+
+@functools.lru_cache(maxsize=512)
+def resolve_voice(voice):
+    """
+    Resolves a requested voice through the voice mappings and parses it into
+    (base_voice, rate, pitch, volume).
+    """
+    return parse_voice_string(voice_mapping.get(voice, voice))
+
+def _ffmpeg_pipe_command(response_format):
+    """Builds the FFmpeg command that transcodes MP3 on stdin to response_format on stdout."""
+    codec, container, _, bitrate = FORMAT_TABLE[response_format]
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel", "error",
+        "-f", "mp3",
+        "-i", "pipe:0",
+        "-c:a", codec,
+        *bitrate,
+        "-f", container,
+        "pipe:1"
+    ]
+
+# Warm FFmpeg processes for the formats clients are expected to request
+FFMPEG_POOL_FORMATS = [
+    fmt.strip() for fmt in os.getenv('FFMPEG_POOL_FORMATS', os.getenv('DEFAULT_RESPONSE_FORMAT', 'mp3')).split(',')
+    if fmt.strip() in FORMAT_TABLE and fmt.strip() != "mp3"
+]
+FFMPEG_POOL_SIZE = int(os.getenv('FFMPEG_POOL_SIZE', str(os.cpu_count() or 1)))
+ffmpeg_pool = FFmpegPool({fmt: _ffmpeg_pipe_command(fmt) for fmt in FFMPEG_POOL_FORMATS}, FFMPEG_POOL_SIZE)
+
+async def start_ffmpeg_pool():
+    # Probing here also caches the FFmpeg check before the first request
+    if is_ffmpeg_installed() and ffmpeg_pool.pipelines:
+        await ffmpeg_pool.start()
+
+async def stop_ffmpeg_pool():
+    await ffmpeg_pool.close()
+
+async def _run_ffmpeg(ffmpeg_command, input_bytes=None):
+    """Runs FFmpeg without blocking the event loop and returns its stdout."""
+    ffmpeg_command = [arg for arg in ffmpeg_command if arg is not None]
+    logging.debug(f"Running FFmpeg command: {' '.join(ffmpeg_command)}")
+    proc = await asyncio.create_subprocess_exec(
+        *ffmpeg_command,
+        stdin=asyncio.subprocess.PIPE if input_bytes is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate(input_bytes)
+    if proc.returncode:
+        logging.error(f"FFmpeg error during audio conversion: {stderr.decode(errors='replace')}")
+        raise RuntimeError(f"FFmpeg error during audio conversion: exit code {proc.returncode}")
+    return stdout
+
+def _output_filename(edge_tts_voice, extension):
+    """Builds a timestamped file name in the output directory."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(DEFAULT_OUTPUT_DIR, f"{edge_tts_voice.replace('-', '_')}_{timestamp}.{extension}")
+
+def _embed_title(output_filename, text):
+    """Embeds the text as the ID3 title of an MP3 file, editing it in place."""
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if converted_file:
-            output_filename = os.path.join(DEFAULT_OUTPUT_DIR, f"{edge_tts_voice.replace('-', '_')}_{timestamp}.{response_format}")
-        else:
-            output_filename = os.path.join(DEFAULT_OUTPUT_DIR, f"{edge_tts_voice.replace('-', '_')}_{timestamp}.mp3")
+        audio = MP3(output_filename, ID3=EasyID3)
+        audio["title"] = text
+        audio.save()
+        logging.debug(f"Embedded text as title metadata in: {output_filename}")
+    except Exception as e:
+        logging.error(f"Error embedding metadata in {output_filename}: {e}")
+
+def _synthesize_chunks(session, chunks, **client_kwargs):
+    """Starts one synthesis task per chunk, at most XUNJIE_PARALLELISM running at once."""
+    sem = asyncio.Semaphore(XUNJIE_PARALLELISM)
+
+    async def synthesize(chunk):
+        async with sem:
+            return await xunjie_synthesize(session, text=chunk, **client_kwargs)
 
-        # Copy the temp file and save it
+    return [asyncio.create_task(synthesize(chunk)) for chunk in chunks]
+
+async def _transcode_chunks(session, chunks, response_format, **client_kwargs):
+    """
+    Synthesizes text chunks concurrently and streams them, in order, into a single
+    FFmpeg process as each one finishes, so encoding overlaps with the remaining
+    network waits. Returns the transcoded audio.
+    """
+    # Start FFmpeg first so a launch failure leaves no synthesis tasks behind
+    if ffmpeg_pool.has(response_format):
+        proc = await ffmpeg_pool.acquire(response_format)
+    else:
+        proc = await asyncio.create_subprocess_exec(
+            *_ffmpeg_pipe_command(response_format),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    tasks = _synthesize_chunks(session, chunks, **client_kwargs)
+
+    async def feed():
         try:
-            shutil.copy2(temp_file_path, output_filename)
-            logging.debug(f"Copied temp file to: {output_filename}")
-        except Exception as e:
-            logging.error(f"Error copying temp file: {e}")
-            return None
-
-        # Add metadata to the copy
-        if response_format == "mp3" and not converted_file:
-            try:
-                audio = MP3(output_filename, ID3=EasyID3)
-                audio["title"] = text
-                audio.save()
-                logging.debug(f"Embedded text as title metadata in: {output_filename}")
-            except Exception as e:
-                logging.error(f"Error embedding metadata in {output_filename}: {e}")
+            for task in tasks:
+                proc.stdin.write(await task)
+                await proc.stdin.drain()
+        finally:
+            proc.stdin.close()
+
+    try:
+        _, stdout, stderr = await asyncio.gather(feed(), proc.stdout.read(), proc.stderr.read())
+        await proc.wait()
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+    if proc.returncode:
+        logging.error(f"FFmpeg error during audio conversion: {stderr.decode(errors='replace')}")
+        raise RuntimeError(f"FFmpeg error during audio conversion: exit code {proc.returncode}")
+    logging.info(f"Successfully streamed {len(chunks)} audio chunks through FFmpeg")
+    return stdout
 
+async def _generate_audio_batch(session, chunks, **client_kwargs):
+    """Synthesizes text chunks concurrently and concatenates them into one MP3."""
+    tasks = _synthesize_chunks(session, chunks, **client_kwargs)
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    logging.info(f"Successfully generated {len(parts)} audio chunks")
+
+    if not is_ffmpeg_installed():
+        # MP3 frames can be joined as-is when FFmpeg is not available
+        return b"".join(parts)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        list_lines = []
+        for i, part in enumerate(parts):
+            part_path = os.path.join(tmpdir, f"part_{i}.mp3")
+            async with aiofiles.open(part_path, 'wb') as f:
+                await f.write(part)
+            list_lines.append(f"file '{part_path}'\n")
+        list_path = os.path.join(tmpdir, "list.txt")
+        async with aiofiles.open(list_path, 'w') as f:
+            await f.write("".join(list_lines))
+
+        return await _run_ffmpeg([
+            "ffmpeg",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-f", "mp3",
+            "pipe:1"
+        ])
+
+def _run_in_background(coro):
+    """Schedules coro on the server's event loop and keeps it alive until it finishes."""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
+
+async def _save_audio_bytes(audio_bytes, edge_tts_voice, response_format):
+    """Saves converted audio data directly to the output directory."""
+    output_filename = _output_filename(edge_tts_voice, response_format)
+    try:
+        async with aiofiles.open(output_filename, 'wb') as f:
+            await f.write(audio_bytes)
         logging.info(f"Saved audio file to: {output_filename}")
         return output_filename
     except Exception as e:
         logging.error(f"Error saving audio file: {e}")
         return None
-    finally:
-         asyncio.create_task(_delayed_cleanup(temp_file_path))
 
-async def _generate_audio(api_key,text, voice, response_format, default_speed):
+async def generate_speech(api_key,text, voice, response_format, default_speed):
     """Generate TTS audio with dynamic rate and pitch adjustments."""
     logging.info(f"Generating audio for text: '{text[:50]}...', voice: {voice}, format: {response_format}, default_speed: {default_speed}")
 
@@ -162,11 +324,8 @@ async def _generate_audio(api_key,text, voice, response_format, default_speed):
         voice = voice[:-2]  # Remove the '+s' flag
         logging.debug(f"Save output flag is set for voice: {voice}")
 
-    # Check for voice mapping
-    base_voice_name = voice_mapping.get(voice, voice)
-
-    # Parse the voice string for adjustments
-    xunjie_tts_voice, rate, pitch, volume = parse_voice_string(base_voice_name)
+    # Resolve the voice mapping and parse the voice string for adjustments
+    xunjie_tts_voice, rate, pitch, volume = resolve_voice(voice)
     emotion = "neutral"
     if pitch is None:
        pitch =DEFAULT_PITCH
@@ -178,13 +337,8 @@ async def _generate_audio(api_key,text, voice, response_format, default_speed):
         volume = DEFAULT_VOLUME
 
 
-    temp_output_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    TEMP_FILES.add(temp_output_file.name)
-
-
     try:
-        client = XunjieClient(
-            text=text,
+        client_kwargs = dict(
             voice=xunjie_tts_voice,
             rate=rate,
             pitch=pitch,
@@ -193,90 +347,59 @@ async def _generate_audio(api_key,text, voice, response_format, default_speed):
             token=api_key,
             emotion=emotion
         )
-        logging.debug(f"xunjie-tts client initialized with voice: {xunjie_tts_voice}, rate: {rate}, pitch: {pitch}, volume: {volume}")
-        await client.save(temp_output_file.name)
-        logging.info(f"Successfully generated audio to temporary file: {temp_output_file.name}")
+        session = await get_session()
+        logging.debug(f"xunjie-tts request prepared with voice: {xunjie_tts_voice}, rate: {rate}, pitch: {pitch}, volume: {volume}")
 
-        if response_format == "mp3":
-            if save_output:
-                asyncio.create_task(_save_audio_file(temp_output_file.name, text, xunjie_tts_voice, response_format, save_output))
-                return temp_output_file.name
-            else:
-                return temp_output_file.name
+        chunks = split_text(text)
+        if len(chunks) > 1:
+            logging.info(f"Splitting text into {len(chunks)} chunks for concurrent synthesis")
 
-        if not is_ffmpeg_installed():
+        transcode = response_format != "mp3" and is_ffmpeg_installed()
+        if response_format != "mp3" and not transcode:
             logging.warning("FFmpeg is not available. Returning unmodified mp3 file.")
-            return temp_output_file.name
 
-        converted_output_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{response_format}")
-        TEMP_FILES.add(converted_output_file.name)
+        if save_output and not transcode:
+            # Download straight to the final location instead of copying a temp file
+            output_path = _output_filename(xunjie_tts_voice, "mp3")
+            if len(chunks) > 1:
+                async with aiofiles.open(output_path, 'wb') as f:
+                    await f.write(await _generate_audio_batch(session, chunks, **client_kwargs))
+            else:
+                await xunjie_save(session, output_path, text=text, **client_kwargs)
 
-        ffmpeg_command = [
-            "ffmpeg",
-            "-i", temp_output_file.name,
-            "-c:a", {
-                "aac": "aac",
-                "mp3": "libmp3lame",
-                "wav": "pcm_s16le",
-                "opus": "libopus",
-                "flac": "flac"
-            }.get(response_format, "aac"),
-            "-b:a", "192k" if response_format != "wav" else None,
-            "-f", {
-                "aac": "mp4",
-                "mp3": "mp3",
-                "wav": "wav",
-                "opus": "ogg",
-                "flac": "flac"
-            }.get(response_format, response_format),
-            "-y",
-            converted_output_file.name
-        ]
+            await asyncio.to_thread(_embed_title, output_path, text)
+            logging.info(f"Saved audio file to: {output_path}")
+            return output_path
 
-        try:
-            logging.debug(f"Running FFmpeg command: {' '.join(ffmpeg_command)}")
-            subprocess.run(ffmpeg_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            logging.info(f"Successfully converted audio to: {response_format}")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"FFmpeg error during audio conversion: {e.stderr.decode()}")
-            raise RuntimeError(f"FFmpeg error during audio conversion: {e}")
+        if transcode and len(chunks) > 1:
+            converted_bytes = await _transcode_chunks(session, chunks, response_format, **client_kwargs)
+            if save_output:
+                _run_in_background(_save_audio_bytes(converted_bytes, xunjie_tts_voice, response_format))
+            return io.BytesIO(converted_bytes)
 
-        if save_output:
-            asyncio.create_task(_save_audio_file(converted_output_file.name, text, xunjie_tts_voice, response_format, save_output, converted_file=True))
-            return converted_output_file.name
+        # Keep the audio in memory and respond without touching the disk
+        if len(chunks) > 1:
+            mp3_bytes = await _generate_audio_batch(session, chunks, **client_kwargs)
         else:
-            return converted_output_file.name
+            mp3_bytes = await xunjie_synthesize(session, text=text, **client_kwargs)
+        logging.info(f"Successfully generated audio in memory: {len(mp3_bytes)} bytes")
 
-    except Exception as e:
-        logging.error(f"Error during TTS generation: {e}",stack_info=True)
-        if temp_output_file and temp_output_file.name in TEMP_FILES:
-            TEMP_FILES.discard(temp_output_file.name)
-        raise
+        if not transcode:
+            return io.BytesIO(mp3_bytes)
 
-def generate_speech(api_key,text, voice, response_format, speed):
-    """同步版本的 generate_speech"""
-    try:
-        # 获取当前事件循环
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            # 如果没有事件循环，创建一个新的
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        # 如果循环正在运行，使用 run_coroutine_threadsafe
-        if loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-                future = pool.submit(lambda: asyncio.run(_generate_audio(api_key,text, voice, response_format, speed)))
-                return future.result()
+        if ffmpeg_pool.has(response_format):
+            converted_bytes = await ffmpeg_pool.submit(mp3_bytes, response_format)
         else:
-            # 如果循环没有运行，直接运行
-            return loop.run_until_complete(_generate_audio(api_key,text, voice, response_format, speed))
-            
+            converted_bytes = await _run_ffmpeg(_ffmpeg_pipe_command(response_format), mp3_bytes)
+        logging.info(f"Successfully converted audio to: {response_format}")
+
+        if save_output:
+            _run_in_background(_save_audio_bytes(converted_bytes, xunjie_tts_voice, response_format))
+        return io.BytesIO(converted_bytes)
+
     except Exception as e:
-        logging.error(f"Error in generate_speech: {e}",stack_info=True)
-        return None
+        logging.error(f"Error during TTS generation: {e}",stack_info=True)
+        raise
 
 def get_models():
     return [
@@ -313,16 +436,6 @@ async def get_voices(language=None):
 #     percentage_change = (speed - 1) * 100
 #     return f"{percentage_change:+.0f}%"
 
-# Purge temp files on startup
-for file_path in list(TEMP_FILES):
-    try:
-        Path(file_path).unlink(missing_ok=True)
-        TEMP_FILES.discard(file_path)
-        logging.info(f"Purged temp file on startup: {file_path}")
-    except Exception as e:
-        logging.error(f"Error purging temp file on startup: {file_path}: {e}")
-
-
 # Example usage (you would integrate this into your API endpoint logic)
 if __name__ == "__main__":
     async def test_speech_generation():
@@ -358,10 +471,13 @@ if __name__ == "__main__":
                 print(f"\n开始测试语音: {voice}")
                 print(f"参数配置: 文本长度={len(text)}, 格式=mp3, 默认语速={DEFAULT_SPEED}")
                 
-                output_file = generate_speech(api_key,text, voice, "mp3", DEFAULT_SPEED)
+                output_file = await generate_speech(api_key,text, voice, "mp3", DEFAULT_SPEED)
                 
                 if output_file:
-                    file_size = os.path.getsize(output_file)
+                    if isinstance(output_file, io.BytesIO):
+                        file_size = len(output_file.getbuffer())
+                    else:
+                        file_size = os.path.getsize(output_file)
                     print(f"生成成功: {output_file}")
                     print(f"文件大小: {file_size/1024:.2f}KB")
                 else:
@@ -371,6 +487,7 @@ if __name__ == "__main__":
             finally:
                 print("-" * 50)
 
+        await close_session()
         print("\n测试完成!")
 
     # 运行测试
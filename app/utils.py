@@ -1,15 +1,26 @@
 # utils.py
 
-from flask import request, jsonify
+from quart import request, jsonify
+from quart.json.provider import DefaultJSONProvider
 from functools import wraps
 import os
 from dotenv import load_dotenv
+import orjson
 
 load_dotenv()
 
 def getenv_bool(name: str, default: bool = False) -> bool:
     return os.getenv(name, str(default)).lower() in ("yes", "y", "true", "1", "t")
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that parses and serializes request/response bodies with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 API_KEY = os.getenv('API_KEY', 'your_api_key_here')
 REQUIRE_API_KEY = getenv_bool('REQUIRE_API_KEY', True)
 
@@ -27,12 +38,13 @@ REQUIRE_API_KEY = getenv_bool('REQUIRE_API_KEY', True)
 #         return f(*args, **kwargs)
 #     return decorated_function
 
-# Mapping of audio format to MIME type
-AUDIO_FORMAT_MIME_TYPES = {
-    "mp3": "audio/mpeg",
-    "opus": "audio/ogg",
-    "aac": "audio/aac",
-    "flac": "audio/flac",
-    "wav": "audio/wav",
-    "pcm": "audio/L16"
+# Mapping of response format to (FFmpeg codec, FFmpeg container, MIME type, bitrate arguments).
+# The containers are chosen to be writable to a pipe, so AAC is emitted as ADTS rather than mp4.
+FORMAT_TABLE = {
+    "mp3": ("libmp3lame", "mp3", "audio/mpeg", ("-b:a", "192k")),
+    "opus": ("libopus", "ogg", "audio/ogg", ("-b:a", "192k")),
+    "aac": ("aac", "adts", "audio/aac", ("-b:a", "192k")),
+    "flac": ("flac", "flac", "audio/flac", ()),
+    "wav": ("pcm_s16le", "wav", "audio/wav", ()),
+    "pcm": ("pcm_s16le", "s16le", "audio/L16", ())
 }
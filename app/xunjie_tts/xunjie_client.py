@@ -1,6 +1,7 @@
 """
 Communicate package.
 """
+import asyncio
 import logging
 import re
 from typing import (
@@ -14,153 +15,223 @@ from typing import (
     Tuple,
     Union,
 )
-class XunjieClient:
+
+import aiofiles
+import aiohttp
+import orjson
+
+# Task polling backoff: first delay, maximum delay and total wall clock budget (seconds)
+POLL_BASE = 0.3
+POLL_CAP = 3.0
+POLL_BUDGET = 60.0
+
+# Request fields that are identical for every call to the Xunjie API
+_CLIENT_PARAMS = {
+    "client": "web",
+    "source": "335",
+    "soft_version": "V4.4.0.0",
+}
+_STATIC_PARAMS = {
+    **_CLIENT_PARAMS,
+    "bgid": 0,
+    "bg_volume": 5,
+    "format": "mp3",
+    "bg_url": "",
+}
+_FORM_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
+}
+
+# Shared HTTP session, reused across requests so that connections to the
+# Xunjie API and its file CDN stay alive between calls.
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared aiohttp session, creating it on first use.
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+        _SESSION = aiohttp.ClientSession(connector=connector)
+    return _SESSION
+
+
+async def close_session() -> None:
+    """
+    Closes the shared aiohttp session if it is open.
+    """
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+async def _get_file_link(
+    session: aiohttp.ClientSession,
+    *,
+    text: str,
+    voice: str,
+    rate: int,
+    pitch: int,
+    volume: int,
+    device_id: str,
+    token: str,
+    emotion: str,
+    timeout: int,
+) -> str:
     """
-    Class for communicating with the service.
+    Submit the text to xunjie TTS API and wait for the audio file link.
     """
+    # 验证输入参数
+    if not text:
+        raise ValueError("text cannot be empty")
+
+    # 构建请求参数
+    params = {
+        **_STATIC_PARAMS,
+        "device_id": device_id,
+        "text": text,
+        "voice": voice,
+        "volume": volume,  
+        "speech_rate": rate, 
+        "pitch_rate": pitch, 
+        "title": text[:10],  # 取前10个字符作为标题
+        "token": token,
+        "emotion": emotion
+    }
+    logging.info(f"Sending request to Xunjie TTS API with params: {params}")
+    # 发送API请求
+    async with session.post(
+        "https://user.api.hudunsoft.com/v1/alivoice/texttoaudio",
+        data=params,
+        headers=_FORM_HEADERS,
+        timeout=timeout
+    ) as response:
+        if response.status != 200:
+            raise RuntimeError(f"API request failed with status {response.status}")
+
+        data = orjson.loads(await response.read())
+
+        # 处理任务ID的情况
+        if data.get("code") == "2105" and data.get("data", {}).get("task_id"):
+            task_id = data["data"]["task_id"]
+            task_params = {
+                **_CLIENT_PARAMS,
+                "device_id": device_id,
+                "taskId": task_id
+            }
+
+            # 轮询任务状态，指数退避，最多等待60秒
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + POLL_BUDGET
+            attempt = 0
+            while True:
+                async with session.post(
+                    "https://user.api.hudunsoft.com/v1/alivoice/textTaskInfo",
+                    data=task_params,
+                    headers=_FORM_HEADERS,
+                    timeout=timeout
+                ) as task_response:
+                    task_data = orjson.loads(await task_response.read())
+                result = {}
+                if task_data.get("code") == 0:
+                    result = task_data.get("data", {}) or {}
+                    if result.get("is_complete"):
+                        file_link = result.get("file_link")
+                        if file_link:
+                            break
+
+                # 优先使用服务端给出的重试间隔
+                delay = min(POLL_CAP, POLL_BASE * (1.6 ** attempt))
+                retry_after = result.get("retry_after")
+                if retry_after is not None:
+                    try:
+                        delay = max(POLL_BASE, float(retry_after))
+                    except (TypeError, ValueError):
+                        pass
+                attempt += 1
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise RuntimeError(f"Task timeout after {POLL_BUDGET:.0f} seconds")
+                await asyncio.sleep(min(delay, remaining))
+
+        elif data.get("code") != 0:
+            raise RuntimeError(f"API error: {data.get('message', 'Unknown error')}")
+        else:
+            # 直接返回文件链接的情况
+            result = data.get("data", {})
+            if not result.get("is_complete"):
+                raise RuntimeError("Audio generation not complete")
+            file_link = result.get("file_link")
+
+        if not file_link:
+            raise RuntimeError("No file link in response")
+
+        return file_link
+
+
+async def xunjie_synthesize(
+    session: aiohttp.ClientSession,
+    *,
+    text: str,
+    voice: str,
+    device_id: str,
+    token: str,
+    rate: int = 4,
+    pitch: int = 4,
+    volume: int = 4,
+    emotion: str = "neutral",
+    timeout: int = 5,
+) -> bytes:
+    """
+    Generate audio from text using xunjie TTS API and return the MP3 data.
+    """
+    file_link = await _get_file_link(
+        session, text=text, voice=voice, rate=rate, pitch=pitch, volume=volume,
+        device_id=device_id, token=token, emotion=emotion, timeout=timeout
+    )
+
+    # 下载音频文件到内存
+    async with session.get(file_link) as audio_response:
+        if audio_response.status != 200:
+            raise RuntimeError(f"Failed to download audio file: {audio_response.status}")
+
+        return await audio_response.read()
+
+
+async def xunjie_save(
+    session: aiohttp.ClientSession,
+    audio_fname: Union[str, bytes],
+    *,
+    text: str,
+    voice: str,
+    device_id: str,
+    token: str,
+    rate: int = 4,
+    pitch: int = 4,
+    volume: int = 4,
+    emotion: str = "neutral",
+    timeout: int = 5,
+) -> None:
+    """
+    Generate audio from text using xunjie TTS API and save to file.
+
+    Args:
+        audio_fname: Path where the audio file should be saved
+    """
+    file_link = await _get_file_link(
+        session, text=text, voice=voice, rate=rate, pitch=pitch, volume=volume,
+        device_id=device_id, token=token, emotion=emotion, timeout=timeout
+    )
+
+    # 下载音频文件
+    async with session.get(file_link) as audio_response:
+        if audio_response.status != 200:
+            raise RuntimeError(f"Failed to download audio file: {audio_response.status}")
 
-    def __init__(
-        self,
-        device_id: str ,
-        token: str ,
-        text: str,
-        voice: str = "Microsoft Server Speech Text to Speech Voice (en-US, AriaNeural)",
-        *,
-        rate: int = 4,
-        volume: int = 4,
-        pitch:  int = 4,
-        receive_timeout: int = 5,
-        emotion: str = "neutral"
-
-    ):
-        """
-        Initializes the Client class.
-
-        Raises:
-
-            ValueError: If the voice is not valid.
-        """
-        if not isinstance(text, str):
-            raise TypeError("text must be str")
-        self.text: str = text
-        self.device_id: str = device_id
-        self.token: str = token
-        self.rate: int = rate
-        self.volume: int = volume
-        self.pitch: int = pitch 
-        self.emotion: str = emotion
-     
-        if not isinstance(voice, str):
-            raise TypeError("voice must be str")
-        self.voice: str = voice
-
-        if not isinstance(receive_timeout, int):
-            raise TypeError("receive_timeout must be int")
-        self.receive_timeout: int = receive_timeout
-
-
-    async def save(
-        self,
-        audio_fname: Union[str, bytes],
-    ) -> str:
-        """
-        Generate audio from text using xunjie TTS API and save to file.
-        
-        Args:
-            audio_fname: Path where the audio file should be saved
-        """
-        import aiohttp
-        import asyncio
-        
-        # 验证输入参数
-        if not self.text:
-            raise ValueError("text cannot be empty")
-            
-        # 构建请求参数
-        params = {
-            "client": "web",
-            "source": "335",
-            "soft_version": "V4.4.0.0", 
-            "device_id": self.device_id,
-            "text": self.text,
-            "bgid": 0,
-            "bg_volume": 5,
-            "format": "mp3",
-            "voice": self.voice,
-            "volume": self.volume,  
-            "speech_rate": self.rate, 
-            "pitch_rate": self.pitch, 
-            "title": self.text[:10],  # 取前10个字符作为标题
-            "token": self.token,
-            "bg_url": "",
-            "emotion": self.emotion
-        }
-        logging.info(f"Sending request to Xunjie TTS API with params: {params}")
-        # 发送API请求
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://user.api.hudunsoft.com/v1/alivoice/texttoaudio",
-                data=params,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
-                },
-                timeout=self.receive_timeout
-            ) as response:
-                if response.status != 200:
-                    raise RuntimeError(f"API request failed with status {response.status}")
-                
-                data = await response.json()
-                
-                # 处理任务ID的情况
-                if data.get("code") == "2105" and data.get("data", {}).get("task_id"):
-                    task_id = data["data"]["task_id"]
-                    task_params = {
-                        "client": "web",
-                        "source": "335",
-                        "soft_version": "V4.4.0.0",
-                        "device_id": self.device_id,
-                        "taskId": task_id
-                    }
-                    
-                    # 轮询任务状态，最多等待60秒
-                    for _ in range(12):  # 5秒一次，最多轮询12次
-                        async with session.post(
-                            "https://user.api.hudunsoft.com/v1/alivoice/textTaskInfo",
-                            data=task_params,
-                            headers={
-                                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
-                            },
-                            timeout=self.receive_timeout
-                        ) as task_response:
-                            task_data = await task_response.json()
-                            if task_data.get("code") == 0:
-                                result = task_data.get("data", {})
-                                if result.get("is_complete"):
-                                    file_link = result.get("file_link")
-                                    if file_link:
-                                        break
-                            await asyncio.sleep(5)
-                    else:
-                        raise RuntimeError("Task timeout after 60 seconds")
-                
-                elif data.get("code") != 0:
-                    raise RuntimeError(f"API error: {data.get('message', 'Unknown error')}")
-                else:
-                    # 直接返回文件链接的情况
-                    result = data.get("data", {})
-                    if not result.get("is_complete"):
-                        raise RuntimeError("Audio generation not complete")
-                    file_link = result.get("file_link")
-                
-                if not file_link:
-                    raise RuntimeError("No file link in response")
-                
-                # 下载音频文件
-                async with session.get(file_link) as audio_response:
-                    if audio_response.status != 200:
-                        raise RuntimeError(f"Failed to download audio file: {audio_response.status}")
-                    
-                    with open(audio_fname, 'wb') as f:
-                        f.write(await audio_response.read())
-                    
-                return 
+        async with aiofiles.open(audio_fname, 'wb') as f:
+            async for chunk in audio_response.content.iter_chunked(64 * 1024):
+                await f.write(chunk)
@@ -0,0 +1,68 @@
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_generate_speech(api_key, text, voice, response_format, speed):
+        return io.BytesIO(b"audio")
+
+    monkeypatch.setattr(server, "generate_speech", fake_generate_speech)
+    return server.app.test_client()
+
+
+def test_speech_returns_audio_attachment(client):
+    async def request():
+        response = await client.post(
+            '/v1/audio/speech',
+            json={"input": "你好", "response_format": "opus"},
+            headers={"Authorization": "Bearer test"},
+        )
+        return response, await response.get_data()
+
+    response, body = asyncio.run(request())
+    assert response.status_code == 200
+    assert response.mimetype == "audio/ogg"
+    assert "speech.opus" in response.headers["Content-Disposition"]
+    assert body == b"audio"
+
+
+def test_speech_rejects_unknown_format(client):
+    async def request():
+        response = await client.post(
+            '/v1/audio/speech',
+            json={"input": "你好", "response_format": "ogg"},
+            headers={"Authorization": "Bearer test"},
+        )
+        return response, await response.get_json()
+
+    response, body = asyncio.run(request())
+    assert response.status_code == 400
+    assert "ogg" in body["error"]
+
+
+def test_speech_reports_generation_failure_as_json(client, monkeypatch):
+    async def failing_generate_speech(api_key, text, voice, response_format, speed):
+        raise RuntimeError("upstream unavailable")
+
+    monkeypatch.setattr(server, "generate_speech", failing_generate_speech)
+
+    async def request():
+        response = await client.post(
+            '/v1/audio/speech',
+            json={"input": "你好"},
+            headers={"Authorization": "Bearer test"},
+        )
+        return response, await response.get_json()
+
+    response, body = asyncio.run(request())
+    assert response.status_code == 502
+    assert "upstream unavailable" in body["error"]
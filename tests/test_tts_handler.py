@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from tts_handler import parse_voice_string, split_text
+
+
+def test_split_text_respects_max_chars():
+    chunks = split_text("a" * 450, max_chars=200)
+    assert [len(chunk) for chunk in chunks] == [200, 200, 50]
+
+
+def test_split_text_keeps_leading_delimiters():
+    text = "！！你好。世界"
+    assert "".join(split_text(text, max_chars=4)) == text
+
+
+def test_split_text_breaks_english_between_words():
+    text = " ".join(["Sentences written in English"] * 20) + " none end with Chinese punctuation."
+    chunks = split_text(text, max_chars=200)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    words = set(text.split())
+    assert all(word in words for chunk in chunks for word in chunk.split())
+
+
+@pytest.mark.parametrize("voice_string, expected", [
+    ("siqi-4-5-7", ("siqi", 4, 5, 7)),
+    ("siqi-11", ("siqi", None, None, None)),
+    ("zh-CN-X", ("zh", None, None, None)),
+    ("-4", ("-4", None, None, None)),
+    ("", ("", None, None, None)),
+])
+def test_parse_voice_string(voice_string, expected):
+    assert parse_voice_string(voice_string) == expected
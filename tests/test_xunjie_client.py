@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+import types
+
+import orjson
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from xunjie_tts import xunjie_client
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status = 200
+        self._body = orjson.dumps(payload)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return self._body
+
+
+class FakeSession:
+    """Returns a task id, then the given task status payloads in order (repeating the last)."""
+
+    def __init__(self, task_payloads):
+        self.task_payloads = list(task_payloads)
+
+    def post(self, url, **kwargs):
+        if url.endswith("/texttoaudio"):
+            return FakeResponse({"code": "2105", "data": {"task_id": "t1"}})
+        payload = self.task_payloads.pop(0) if len(self.task_payloads) > 1 else self.task_payloads[0]
+        return FakeResponse(payload)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Replaces the client's clock and sleep with a fake clock, recording every delay."""
+    clock = {"now": 0.0}
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(round(delay, 4))
+        clock["now"] += delay
+
+    fake_loop = types.SimpleNamespace(time=lambda: clock["now"])
+    fake_asyncio = types.SimpleNamespace(sleep=fake_sleep, get_running_loop=lambda: fake_loop)
+    monkeypatch.setattr(xunjie_client, "asyncio", fake_asyncio)
+    return recorded
+
+
+def get_file_link(session):
+    return asyncio.run(xunjie_client._get_file_link(
+        session, text="你好", voice="siqi", rate=4, pitch=4, volume=4,
+        device_id="d", token="t", emotion="neutral", timeout=5,
+    ))
+
+
+PENDING = {"code": 0, "data": {"is_complete": False}}
+DONE = {"code": 0, "data": {"is_complete": True, "file_link": "https://example.com/a.mp3"}}
+
+
+def test_polling_backs_off_exponentially_up_to_cap(sleeps):
+    assert get_file_link(FakeSession([PENDING] * 7 + [DONE])) == "https://example.com/a.mp3"
+    expected = [round(min(xunjie_client.POLL_CAP, xunjie_client.POLL_BASE * 1.6 ** i), 4) for i in range(7)]
+    assert sleeps == expected
+    assert sleeps[-1] == xunjie_client.POLL_CAP
+
+
+def test_polling_honours_retry_after_with_lower_bound(sleeps):
+    payloads = [
+        {"code": 0, "data": {"is_complete": False, "retry_after": 10}},
+        {"code": 0, "data": {"is_complete": False, "retry_after": 0}},
+        DONE,
+    ]
+    get_file_link(FakeSession(payloads))
+    assert sleeps == [10.0, xunjie_client.POLL_BASE]
+
+
+def test_polling_times_out_after_budget(sleeps):
+    with pytest.raises(RuntimeError, match="Task timeout"):
+        get_file_link(FakeSession([PENDING]))
+    assert sum(sleeps) == pytest.approx(xunjie_client.POLL_BUDGET)